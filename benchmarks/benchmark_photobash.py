@@ -0,0 +1,315 @@
+# Photobash Images is a Krita plugin to get CC0 images based on a search,
+# straight from the Krita Interface. Useful for textures and concept art!
+# Copyright (C) 2020  Pedro Reis.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Times the hot paths of the docker without Krita, on a generated references folder,
+# and prints the results as JSON so runs can be compared.
+#
+# python benchmarks/benchmark_photobash.py --files 10000 --output bench_output.txt
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+import krita_stub
+krita_stub.install()
+
+from PyQt5.QtCore import Qt, QSize, QStandardPaths, QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtGui import QImage, QImageWriter, QColor, QPainter, QLinearGradient
+from PyQt5.QtWidgets import QApplication
+
+FORMATS = ["jpg", "png", "webp"]
+WORDS = ["rock", "marble", "tree", "sky", "water", "metal", "wood", "fabric", "sand", "brick"]
+
+def createTemplate(width, height, fileFormat, path, variant):
+    image = QImage(width, height, QImage.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor((200 + variant * 37) % 256, (120 + variant * 53) % 256, 40))
+    gradient.setColorAt(0.5, QColor(variant * 91 % 256, 255 - variant * 29 % 256, variant * 13 % 256))
+    gradient.setColorAt(1, QColor(30, (60 + variant * 71) % 256, 160))
+    painter.fillRect(image.rect(), gradient)
+    painter.end()
+
+    if not image.save(path, fileFormat):
+        return None
+
+    with open(path, "rb") as templateFile:
+        return templateFile.read()
+
+# nested folders with mixed formats, named after common search words.
+# only a few variants of each format are encoded, and the files cycle through them
+def createTree(root, numFiles, filesPerFolder, width, height, variants):
+    supported = [bytes(fileFormat).decode() for fileFormat in QImageWriter.supportedImageFormats()]
+    formats = [fileFormat for fileFormat in FORMATS if fileFormat in supported]
+
+    templates = {}
+    for fileFormat in formats:
+        templatePath = os.path.join(root, "template." + fileFormat)
+        templates[fileFormat] = [createTemplate(width, height, fileFormat, templatePath, variant) for variant in range(0, variants)]
+        os.remove(templatePath)
+
+    for i in range(0, numFiles):
+        folder = i // filesPerFolder
+        directory = os.path.join(root, WORDS[folder % len(WORDS)], f"set{folder // len(WORDS)}", f"part{folder % 3}")
+        if i % filesPerFolder == 0:
+            os.makedirs(directory, exist_ok=True)
+
+        fileFormat = formats[i % len(formats)]
+        with open(os.path.join(directory, f"{WORDS[(i // 7) % len(WORDS)]}_{i}.{fileFormat}"), "wb") as imageFile:
+            imageFile.write(templates[fileFormat][(i // len(formats)) % variants])
+
+    return formats
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+# the generated files were just written, so they are still in the page cache.
+# dropping it affects the whole system and needs root on Linux, so it's only done with --drop-caches
+def dropDiskCache():
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as dropCaches:
+            dropCaches.write("3\n")
+        return True
+    except (OSError, AttributeError):
+        return False
+
+def timeCall(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def clearThumbnails(docker):
+    docker.cachedImages = {}
+    docker.cachedPathImages = []
+
+def scanRoots(docker):
+    for root in docker.rootPaths:
+        if not root in docker.disabledRootPaths:
+            docker.refreshRoot(root)
+
+# getImagesFromDirectory also merges the folders and runs the filter and a page update,
+# so the scan of the folders and the merge are timed on their own
+def benchmarkScan(docker, repeat, dropCaches):
+    cold = []
+    warm = []
+    merges = []
+
+    for i in range(0, repeat):
+        # cold scan, without any index in memory or on disk
+        docker.rootIndexes = {}
+        docker.rootSearchPaths = {}
+        shutil.rmtree(docker.indexDirectory, ignore_errors=True)
+        if dropCaches:
+            dropDiskCache()
+        cold.append(timeCall(scanRoots, docker))
+        merges.append(timeCall(docker.mergeRoots))
+
+        # warm scan, only directories are checked
+        warm.append(timeCall(scanRoots, docker))
+        merges.append(timeCall(docker.mergeRoots))
+
+    return {"scan_cold": summarize(cold), "scan_warm": summarize(warm), "scan_merge_and_filter": summarize(merges)}
+
+# every keystroke filters and then updates the page, which may decode thumbnails,
+# so the page update is timed on its own and taken out of the filter time
+def benchmarkFilter(docker, query):
+    keystrokes = []
+    updates = []
+    filterTextEdit = docker.layout.filterTextEdit
+    updateImages = docker.updateImages
+
+    def timedUpdateImages():
+        updates.append(timeCall(updateImages))
+
+    docker.updateImages = timedUpdateImages
+    try:
+        # type the query one key at a time, then erase it
+        texts = [query[:i] for i in range(1, len(query) + 1)] + [query[:i] for i in range(len(query) - 1, -1, -1)]
+        for text in texts:
+            numUpdates = len(updates)
+            total = timeCall(filterTextEdit.setText, text)
+            keystrokes.append(total - sum(updates[numUpdates:]))
+    finally:
+        del docker.updateImages
+
+    return {"filter_keystroke": summarize(keystrokes), "filter_page_update": summarize(updates)}
+
+def benchmarkThumbnails(docker, count, dropCaches):
+    paths = docker.allImages[:count]
+    cold = []
+    warm = []
+
+    clearThumbnails(docker)
+    if dropCaches:
+        dropDiskCache()
+    for path in paths:
+        cold.append(timeCall(docker.getImage, path))
+
+    for path in paths:
+        warm.append(timeCall(docker.getImage, path))
+
+    return {"get_image_cold": summarize(cold), "get_image_warm": summarize(warm)}
+
+def benchmarkPages(docker, pages, dropCaches):
+    cold = []
+    warm = []
+
+    docker.layout.filterTextEdit.setText("")
+    clearThumbnails(docker)
+    docker.currPage = 0
+    docker.updateImages()
+    if dropCaches:
+        dropDiskCache()
+
+    for i in range(0, pages):
+        cold.append(timeCall(docker.updateCurrentPage, 1))
+
+    # turning back only uses the cached thumbnails, as long as they fit in the cache
+    for i in range(0, pages):
+        warm.append(timeCall(docker.updateCurrentPage, -1))
+
+    return {"page_turn_cold": summarize(cold), "page_turn_warm": summarize(warm)}
+
+def benchmarkPlacement(docker, count):
+    results = {}
+    paths = docker.allImages[:count]
+
+    for fitCanvas in [True, False]:
+        docker.fitCanvasChecked = fitCanvas
+        samples = []
+
+        for path in paths:
+            docker.clearPlacementCache()
+            samples.append(timeCall(docker.addImageLayer, path))
+
+        results["place_fit_canvas" if fitCanvas else "place_original_size"] = summarize(samples)
+
+    samples = []
+    for path in paths:
+        docker.clearPlacementCache()
+        samples.append(timeCall(docker.placeReference, path))
+    results["place_reference_proxy"] = summarize(samples)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Photobash Images docker without Krita.")
+    parser.add_argument("--files", type=int, default=1000, help="number of images in the generated folder (1000 to 500000)")
+    parser.add_argument("--files-per-folder", type=int, default=100)
+    parser.add_argument("--image-width", type=int, default=1600)
+    parser.add_argument("--image-height", type=int, default=1200)
+    parser.add_argument("--variants", type=int, default=16, help="number of different images encoded for each format")
+    parser.add_argument("--canvas-width", type=int, default=2000)
+    parser.add_argument("--canvas-height", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3, help="number of times each folder scan is timed")
+    parser.add_argument("--query", default="rock marble", help="filter text, typed one key at a time")
+    parser.add_argument("--thumbnails", type=int, default=45, help="number of images decoded for thumbnails")
+    parser.add_argument("--pages", type=int, default=5, help="number of page turns")
+    parser.add_argument("--placements", type=int, default=5, help="number of images placed on the canvas")
+    parser.add_argument("--drop-caches", action="store_true", help="empty the system page cache before cold timings (Linux, needs root, affects the whole system)")
+    parser.add_argument("--directory", help="use this folder instead of generating one")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    # keep the settings and indexes of the benchmark away from the real ones
+    QStandardPaths.setTestModeEnabled(True)
+
+    workDirectory = tempfile.mkdtemp(prefix="photobash_benchmark_")
+    try:
+        if args.directory:
+            root = os.path.realpath(args.directory)
+            formats = []
+        else:
+            root = os.path.join(workDirectory, "references")
+            os.makedirs(root)
+            start = time.perf_counter()
+            formats = createTree(root, args.files, args.files_per_folder, args.image_width, args.image_height, args.variants)
+            print(f"Generated {args.files} images in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        from photobash_images.photobash_images_docker import PhotobashDocker
+
+        krita = krita_stub.Krita.instance()
+        krita.writeSetting("Photobash", "referencesDirectories", json.dumps([root]))
+        krita.setActiveDocument(krita_stub.Document(args.canvas_width, args.canvas_height))
+
+        docker = PhotobashDocker()
+        docker.indexDirectory = os.path.join(workDirectory, "index")
+        docker.resize(400, 800)
+
+        # checked once up front, so the results say whether cold timings really read from disk
+        coldReads = args.drop_caches and dropDiskCache()
+        if args.drop_caches and not coldReads:
+            print("Could not drop the page cache, cold timings will read from memory", file=sys.stderr)
+
+        results = {}
+        results.update(benchmarkScan(docker, args.repeat, coldReads))
+        results.update(benchmarkFilter(docker, args.query))
+        results.update(benchmarkThumbnails(docker, args.thumbnails, coldReads))
+        results.update(benchmarkPages(docker, args.pages, coldReads))
+        results.update(benchmarkPlacement(docker, args.placements))
+
+        output = {
+            "environment": {
+                "python": platform.python_version(),
+                "qt": QT_VERSION_STR,
+                "pyqt": PYQT_VERSION_STR,
+                "platform": platform.platform(),
+            },
+            "parameters": {
+                "files": len(docker.allImages),
+                "formats": formats,
+                "files_per_folder": args.files_per_folder,
+                "image_size": [args.image_width, args.image_height],
+                "canvas_size": [args.canvas_width, args.canvas_height],
+                "variants": args.variants,
+                "cold_reads_from_disk": coldReads,
+            },
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(workDirectory, ignore_errors=True)
+
+    text = json.dumps(output, indent=4)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
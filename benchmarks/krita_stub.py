@@ -0,0 +1,112 @@
+# Photobash Images is a Krita plugin to get CC0 images based on a search,
+# straight from the Krita Interface. Useful for textures and concept art!
+# Copyright (C) 2020  Pedro Reis.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Minimal stand-in for the krita module, with just what the plugin uses,
+# so the plugin can run outside of Krita. Registered with install().
+
+import sys
+from PyQt5 import QtCore, QtGui, QtWidgets
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from PyQt5.QtWidgets import *
+
+class Document():
+    def __init__(self, width, height):
+        self.documentWidth = width
+        self.documentHeight = height
+
+    def width(self):
+        return self.documentWidth
+
+    def height(self):
+        return self.documentHeight
+
+    def refreshProjection(self):
+        pass
+
+class Action():
+    def __init__(self, name):
+        self.name = name
+
+    def trigger(self):
+        pass
+
+class Krita():
+    kritaInstance = None
+
+    def __init__(self):
+        self.settings = {}
+        self.document = None
+
+    @staticmethod
+    def instance():
+        if Krita.kritaInstance is None:
+            Krita.kritaInstance = Krita()
+
+        return Krita.kritaInstance
+
+    def readSetting(self, group, name, defaultValue):
+        return self.settings.get((group, name), defaultValue)
+
+    def writeSetting(self, group, name, value):
+        self.settings[(group, name)] = value
+
+    def activeDocument(self):
+        return self.document
+
+    def setActiveDocument(self, document):
+        self.document = document
+
+    def activeWindow(self):
+        return None
+
+    def action(self, name):
+        return Action(name)
+
+    def openDocument(self, path):
+        return None
+
+    def addDockWidgetFactory(self, factory):
+        pass
+
+class View():
+    pass
+
+class Canvas():
+    def view(self):
+        return View()
+
+class DockWidget(QDockWidget):
+    def canvas(self):
+        return Canvas()
+
+    def canvasChanged(self, canvas):
+        pass
+
+class DockWidgetFactoryBase():
+    DockRight = 0
+
+class DockWidgetFactory(DockWidgetFactoryBase):
+    def __init__(self, name, position, widgetClass):
+        self.name = name
+        self.position = position
+        self.widgetClass = widgetClass
+
+Application = Krita.instance()
+
+def install():
+    sys.modules["krita"] = sys.modules[__name__]
@@ -24,7 +24,10 @@ from .photobash_images_modulo import (
     Photobash_Display,
     Photobash_Button,
 )
+from .photobash_images_stats import stats
 import os.path
+import json
+import hashlib
 
 class PhotobashDocker(DockWidget):
     def __init__(self):
@@ -41,29 +44,53 @@ class PhotobashDocker(DockWidget):
         self.mainWidget = QWidget(self)
 
         self.applicationName = "Photobash"
+        # single folder used before multiple folders were supported
         self.referencesSetting = "referencesDirectory"
+        self.rootsSetting = "referencesDirectories"
+        self.disabledRootsSetting = "disabledReferencesDirectories"
         self.fitCanvasSetting = "fitToCanvas"
         self.foundFavouritesSetting = "currentFavourites"
+        self.statsSetting = "performanceStats"
 
         self.currImageScale = 100
         self.fitCanvasChecked = bool(Application.readSetting(self.applicationName, self.fitCanvasSetting, "True"))
         self.imagesButtons = []
         self.foundImages = []
+        self.allImages = []
         self.favouriteImages = []
+        # maps each found image to the lowercase path inside its folder, used for searching
+        self.searchPaths = {}
+        # maps each references folder to its index, which maps directory to [modification time, images]
+        self.rootIndexes = {}
+        # maps each references folder to its images and their search paths, in directory order
+        self.rootSearchPaths = {}
         # maps path to image
         self.cachedImages = {}
         # store order of push
         self.cachedPathImages = []
         self.maxCachedImages = 90
+        # maps (path, width, height) to the last images decoded for placing
+        self.cachedPlacementImages = {}
+        self.cachedPathPlacements = []
+        self.cachedPlacementBytes = 0
+        self.maxCachedPlacements = 3
+        self.maxCachedPlacementBytes = 256 * 1024 * 1024
         self.maxNumPages = 9999
 
         self.currPage = 0
-        self.directoryPath = Application.readSetting(self.applicationName, self.referencesSetting, "")
-        favouriteImagesValues = Application.readSetting(self.applicationName, self.foundFavouritesSetting, "").split("'")
+        self.rootPaths = self.readListSetting(self.rootsSetting)
+        self.disabledRootPaths = self.readListSetting(self.disabledRootsSetting)
+        self.favouriteImages = self.readFavouritesSetting()
 
-        for value in favouriteImagesValues:
-            if value != "[" and value != ", " and value != "]" and value != "" and value != "[]":
-                self.favouriteImages.append(value)
+        # only migrate the single folder once, so removing every folder sticks
+        directoryPath = Application.readSetting(self.applicationName, self.referencesSetting, "")
+        rootsValue = Application.readSetting(self.applicationName, self.rootsSetting, "")
+        if rootsValue == "" and directoryPath != "":
+            self.rootPaths = [directoryPath]
+            self.writeListSetting(self.rootsSetting, self.rootPaths)
+
+        self.indexDirectory = QStandardPaths.writableLocation(QStandardPaths.CacheLocation) + "/photobash_images"
+        stats.setEnabled(Application.readSetting(self.applicationName, self.statsSetting, "false") == "true")
 
         self.bg_alpha = str("background-color: rgba(0, 0, 0, 50); ")
         self.bg_hover = str("background-color: rgba(0, 0, 0, 100); ")
@@ -99,7 +126,18 @@ class PhotobashDocker(DockWidget):
 
         # setup connections for top elements
         self.layout.filterTextEdit.textChanged.connect(self.textFilterChanged)
-        self.layout.changePathButton.clicked.connect(self.changePath)
+        self.rootsMenu = QMenu(self.layout.changePathButton)
+        self.rootsMenu.aboutToShow.connect(self.updateRootsMenu)
+        self.layout.changePathButton.setMenu(self.rootsMenu)
+
+        # debug overlay with the performance stats, on top of the images
+        self.statsLabel = QLabel(self.layout.middleWidget)
+        self.statsLabel.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.statsLabel.setStyleSheet("background-color: rgba(0, 0, 0, 180); color: white; font-family: monospace; padding: 4px;")
+        self.statsTimer = QTimer(self)
+        self.statsTimer.setInterval(1000)
+        self.statsTimer.timeout.connect(self.updateStats)
+        self.showStats(stats.enabled)
         # setup connections for bottom elements
         self.layout.previousButton.clicked.connect(lambda: self.updateCurrentPage(-1))
         self.layout.nextButton.clicked.connect(lambda: self.updateCurrentPage(1))
@@ -129,6 +167,7 @@ class PhotobashDocker(DockWidget):
             imageButton.SIGNAL_UN_FAVOURITE.connect(self.unpinFromFavourites)
             imageButton.SIGNAL_OPEN_NEW.connect(self.openNewDocument)
             imageButton.SIGNAL_REFERENCE.connect(self.placeReference)
+            imageButton.SIGNAL_REFERENCE_FULL.connect(self.placeFullReference)
             self.imagesButtons.append(imageButton)
 
     def setStyle(self):
@@ -137,8 +176,8 @@ class PhotobashDocker(DockWidget):
 
     def initialize(self):
         # initialize based on what was setup
-        if self.directoryPath != "":
-            self.layout.changePathButton.setText("Change References Folder")
+        if len(self.rootPaths) > 0:
+            self.layout.changePathButton.setText("References Folders")
             self.getImagesFromDirectory()
             self.layout.fitCanvasCheckBox.setChecked(self.fitCanvasChecked)
 
@@ -160,9 +199,11 @@ class PhotobashDocker(DockWidget):
         self.foundImages = favouriteFoundImages + self.foundImages
 
     def textFilterChanged(self):
+        start = stats.start()
         stringsInText = self.layout.filterTextEdit.text().lower().split(" ")
         if self.layout.filterTextEdit.text().lower() == "":
             self.foundImages = copy.deepcopy(self.allImages)
+            stats.stop("filter", start, len(self.allImages))
             self.reorganizeImages()
             self.updateImages()
             return 
@@ -171,37 +212,144 @@ class PhotobashDocker(DockWidget):
         for word in stringsInText:
             for path in self.allImages:
                 # exclude path outside from search
-                if word in path.replace(self.directoryPath, "").lower() and not path in newImages and word != "" and word != " ":
+                if word in self.searchPaths[path] and not path in newImages and word != "" and word != " ":
                     newImages.append(path)
 
         self.foundImages = newImages
+        stats.stop("filter", start, len(self.allImages))
         self.reorganizeImages()
         self.updateImages()
 
+    # refreshes every enabled references folder, only listing directories that changed since the last scan
     def getImagesFromDirectory(self):
-        newImages = []
         self.currPage = 0
 
-        if self.directoryPath == "":
-            self.foundImages = []
-            self.favouriteImages = []
-            self.updateImages()
-            return 
+        for root in self.rootPaths:
+            if not root in self.disabledRootPaths:
+                self.refreshRoot(root)
 
-        it = QDirIterator(self.directoryPath, QDirIterator.Subdirectories)
+        self.mergeRoots()
 
+    def refreshRoot(self, root):
+        start = stats.start()
+        index = self.rootIndexes[root] if root in self.rootIndexes else self.loadRootIndex(root)
+        newIndex = {}
+        changed = False
 
+        directories = [root]
+        it = QDirIterator(root, QDir.Dirs | QDir.NoDotAndDotDot, QDirIterator.Subdirectories)
         while(it.hasNext()):
-            if (".webp" in it.filePath() or ".png" in it.filePath() or ".jpg" in it.filePath() or ".jpeg" in it.filePath()) and \
-                (not ".webp~" in it.filePath() and not ".png~" in it.filePath() and not ".jpg~" in it.filePath() and not ".jpeg~" in it.filePath()):
-                newImages.append(it.filePath())
+            directories.append(it.next())
 
-            it.next()
+        for directory in directories:
+            modified = QFileInfo(directory).lastModified().toMSecsSinceEpoch()
 
-        self.foundImages = copy.deepcopy(newImages)
-        self.allImages = copy.deepcopy(newImages)
-        self.reorganizeImages()
-        self.updateImages()
+            if directory in index and index[directory][0] == modified:
+                newIndex[directory] = index[directory]
+            else:
+                newIndex[directory] = [modified, self.getImagesFromFolder(directory)]
+                changed = True
+
+        # every kept directory was already in the index, so a different size means some were removed
+        if len(newIndex) != len(index):
+            changed = True
+
+        self.rootIndexes[root] = newIndex
+        if changed:
+            self.saveRootIndex(root)
+
+        if changed or not root in self.rootSearchPaths:
+            searchPaths = {}
+            for directory, (modified, images) in newIndex.items():
+                for path in images:
+                    searchPaths[path] = path[len(root):].lower()
+            self.rootSearchPaths[root] = searchPaths
+
+        if stats.enabled:
+            stats.stop("scan", start, sum(len(images) for modified, images in newIndex.values()))
+
+    def getImagesFromFolder(self, directory):
+        images = []
+
+        for fileName in QDir(directory).entryList(QDir.Files):
+            if (".webp" in fileName or ".png" in fileName or ".jpg" in fileName or ".jpeg" in fileName) and \
+                (not ".webp~" in fileName and not ".png~" in fileName and not ".jpg~" in fileName and not ".jpeg~" in fileName):
+                images.append(directory + "/" + fileName)
+
+        return images
+
+    # joins the images of the enabled folders, in the order they were added, and applies the current filter.
+    # each folder keeps its own list, so this never touches the disk or the indexes
+    def mergeRoots(self):
+        self.searchPaths = {}
+
+        for root in self.rootPaths:
+            if root in self.disabledRootPaths or not root in self.rootSearchPaths:
+                continue
+
+            rootSearchPaths = self.rootSearchPaths[root]
+            # folders inside other folders would show the same images twice
+            if not self.searchPaths.keys().isdisjoint(rootSearchPaths):
+                rootSearchPaths = {path: searchPath for path, searchPath in rootSearchPaths.items() if not path in self.searchPaths}
+
+            self.searchPaths.update(rootSearchPaths)
+
+        self.allImages = list(self.searchPaths)
+        self.textFilterChanged()
+
+    def getRootIndexPath(self, root):
+        return self.indexDirectory + "/" + hashlib.md5(root.encode("utf-8")).hexdigest() + ".json"
+
+    # indexes are kept on disk, so a restart only needs to look at the directories
+    def loadRootIndex(self, root):
+        try:
+            with open(self.getRootIndexPath(root), "r", encoding="utf-8") as indexFile:
+                return json.load(indexFile)
+        except (OSError, ValueError):
+            return {}
+
+    def saveRootIndex(self, root):
+        try:
+            os.makedirs(self.indexDirectory, exist_ok=True)
+            with open(self.getRootIndexPath(root), "w", encoding="utf-8") as indexFile:
+                json.dump(self.rootIndexes[root], indexFile)
+        except OSError:
+            pass
+
+    # lists are saved as json, so paths with quotes in them are read back unchanged
+    def readListSetting(self, setting):
+        try:
+            values = json.loads(Application.readSetting(self.applicationName, setting, "[]"))
+        except ValueError:
+            return []
+
+        if not isinstance(values, list):
+            return []
+
+        return [value for value in values if isinstance(value, str)]
+
+    def writeListSetting(self, setting, values):
+        Application.writeSetting(self.applicationName, setting, json.dumps(values))
+
+    # favourites used to be saved with str(list), which isn't json, so convert them once
+    def readFavouritesSetting(self):
+        favouriteImagesValue = Application.readSetting(self.applicationName, self.foundFavouritesSetting, "")
+
+        try:
+            json.loads(favouriteImagesValue)
+        except ValueError:
+            if favouriteImagesValue == "":
+                return []
+
+            favouriteImages = []
+            for value in favouriteImagesValue.split("'"):
+                if value != "[" and value != ", " and value != "]" and value != "" and value != "[]":
+                    favouriteImages.append(value)
+
+            self.writeListSetting(self.foundFavouritesSetting, favouriteImages)
+            return favouriteImages
+
+        return self.readListSetting(self.foundFavouritesSetting)
 
     def updateCurrentPage(self, increment):
         if (self.currPage == 0 and increment == -1) or \
@@ -261,18 +409,68 @@ class PhotobashDocker(DockWidget):
     # checks if image is cached, and if it isn't, create it and cache it
     def getImage(self, path):
         if path in self.cachedPathImages:
+            stats.count("thumbnail cache hit")
             return self.cachedImages[path]
 
+        stats.count("thumbnail cache miss")
+
         # need to remove from cache
         if len(self.cachedImages) > self.maxCachedImages: 
             removedPath = self.cachedPathImages.pop()
             self.cachedImages.pop(removedPath)
 
         self.cachedPathImages = [path] + self.cachedPathImages
-        self.cachedImages[path] = QImage(path).scaled(200, 200, Qt.KeepAspectRatio, Qt.FastTransformation)
+
+        start = stats.start()
+        image = QImage(path)
+        stats.stop("thumbnail read", start)
+
+        start = stats.start()
+        self.cachedImages[path] = image.scaled(200, 200, Qt.KeepAspectRatio, Qt.FastTransformation)
+        stats.stop("thumbnail scale", start)
 
         return self.cachedImages[path]
 
+    # decodes the image already scaled to fit size, instead of decoding the full resolution and scaling after
+    def getPlacementImage(self, path, size):
+        key = (path, size.width(), size.height())
+        if key in self.cachedPlacementImages:
+            stats.count("placement cache hit")
+            return self.cachedPlacementImages[key]
+
+        stats.count("placement cache miss")
+        start = stats.start()
+        reader = QImageReader(path)
+        # some formats can't report their size anymore once read
+        sourceSize = reader.size()
+        if sourceSize.isValid() and not size.isEmpty():
+            reader.setScaledSize(sourceSize.scaled(size, Qt.KeepAspectRatio))
+        image = reader.read()
+        stats.stop("placement decode", start)
+
+        # only keep proxies, images as large as the original are freed once placed
+        if image.width() >= sourceSize.width() and image.height() >= sourceSize.height():
+            return image
+        if image.sizeInBytes() > self.maxCachedPlacementBytes:
+            return image
+
+        # need to remove from cache
+        while len(self.cachedPathPlacements) >= self.maxCachedPlacements or \
+            self.cachedPlacementBytes + image.sizeInBytes() > self.maxCachedPlacementBytes:
+            removedKey = self.cachedPathPlacements.pop()
+            self.cachedPlacementBytes -= self.cachedPlacementImages.pop(removedKey).sizeInBytes()
+
+        self.cachedPathPlacements = [key] + self.cachedPathPlacements
+        self.cachedPlacementImages[key] = image
+        self.cachedPlacementBytes += image.sizeInBytes()
+
+        return image
+
+    def clearPlacementCache(self):
+        self.cachedPlacementImages = {}
+        self.cachedPathPlacements = []
+        self.cachedPlacementBytes = 0
+
     # makes sure the first 9 found images exist
     def checkValidImages(self):
         found = 0
@@ -284,6 +482,7 @@ class PhotobashDocker(DockWidget):
                 found = found + 1
 
     def updateImages(self):
+        start = stats.start()
         self.checkValidImages()
         buttonsSize = len(self.imagesButtons)
 
@@ -322,6 +521,7 @@ class PhotobashDocker(DockWidget):
         # correction since array begins at 0
         self.layout.paginationSlider.setRange(0, maxNumPage - 1)
         self.layout.paginationSlider.setSliderPosition(self.currPage)
+        stats.stop("update images", start)
 
     def addImageLayer(self, photoPath):
         # file no longer exists, remove from all structures
@@ -340,15 +540,15 @@ class PhotobashDocker(DockWidget):
         if self.canvas() is None or self.canvas().view() is None:
             return 
 
+        start = stats.start()
         scale = self.currImageScale / 100
 
         # Scale Image
         if self.fitCanvasChecked:
-            image = QImage(photoPath).scaled(int(doc.width() * scale), int(doc.height() * scale), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            image = self.getPlacementImage(photoPath, QSize(int(doc.width() * scale), int(doc.height() * scale)))
         else:
-            image = QImage(photoPath)
-            # scale image
-            image = image.scaled(int(image.width() * scale), int(image.height() * scale), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            size = QImageReader(photoPath).size()
+            image = self.getPlacementImage(photoPath, QSize(int(size.width() * scale), int(size.height() * scale)))
 
         # MimeData
         mimedata = QMimeData()
@@ -362,6 +562,7 @@ class PhotobashDocker(DockWidget):
         # Place Image and Refresh Canvas
         Krita.instance().action('edit_paste').trigger()
         Krita.instance().activeDocument().refreshProjection()
+        stats.stop("place layer", start)
 
     def checkPath(self, path):
         if not os.path.isfile(path):
@@ -389,27 +590,66 @@ class PhotobashDocker(DockWidget):
         document = Krita.instance().openDocument(path)
         Application.activeWindow().addView(document)
 
+    # places a proxy of the image, only as large as the canvas (or the screen, without a document)
     def placeReference(self, path):
         if not self.checkPath(path):
             self.updateImages()
             return
 
+        doc = Krita.instance().activeDocument()
+        if doc is None:
+            screen = QApplication.primaryScreen()
+            size = screen.size() * screen.devicePixelRatio()
+        else:
+            size = QSize(doc.width(), doc.height())
+
+        # never scale up, a proxy larger than the original makes no sense
+        size = size.boundedTo(QImageReader(path).size())
+        self.pasteReference(path, self.getPlacementImage(path, size))
+
+    def placeFullReference(self, path):
+        if not self.checkPath(path):
+            self.updateImages()
+            return
+
+        self.pasteReference(path, QImage(path))
+
+    def pasteReference(self, path, image):
         # MimeData
         mimedata = QMimeData()
         url = QUrl().fromLocalFile(path)
         mimedata.setUrls([url])
-        image = QImage(path)
         mimedata.setImageData(image)
 
         QApplication.clipboard().setImage(image)
         Krita.instance().action('paste_as_reference').trigger()
 
+        self.reportReferenceMemory(path, image)
+
+    # references stay in memory while pinned, so let the artist know what they cost
+    def reportReferenceMemory(self, path, image):
+        window = Application.activeWindow()
+        if window is None:
+            return
+
+        megabyte = 1024 * 1024
+        message = f"Reference {image.width()}x{image.height()}: {image.sizeInBytes() / megabyte:.1f} MB"
+
+        fullSize = QImageReader(path).size()
+        if fullSize.width() > image.width():
+            fullBytes = fullSize.width() * fullSize.height() * image.depth() / 8
+            message += f" (full resolution {fullSize.width()}x{fullSize.height()}: {fullBytes / megabyte:.1f} MB)"
+
+        window.qwindow().statusBar().showMessage(message, 5000)
+
     def openPreview(self, path):
         self.imageWidget.setImage(path, self.getImage(path))
         self.layout.imageWidget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.layout.middleWidget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Ignored)
 
     def closePreview(self):
+        # a closed preview keeps no decoded image around
+        self.imageWidget.setImage("", None)
         self.layout.imageWidget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Ignored)
         self.layout.middleWidget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
@@ -418,7 +658,7 @@ class PhotobashDocker(DockWidget):
         self.favouriteImages = [path] + self.favouriteImages
 
         # save setting for next restart
-        Application.writeSetting(self.applicationName, self.foundFavouritesSetting, str(self.favouriteImages))
+        self.writeListSetting(self.foundFavouritesSetting, self.favouriteImages)
         self.reorganizeImages()
         self.updateImages()
 
@@ -426,7 +666,7 @@ class PhotobashDocker(DockWidget):
         if path in self.favouriteImages:
             self.favouriteImages.remove(path)
 
-        Application.writeSetting(self.applicationName, self.foundFavouritesSetting, str(self.favouriteImages))
+        self.writeListSetting(self.foundFavouritesSetting, self.favouriteImages)
 
         # resets order to the default, but checks if foundImages is only a subset
         # in case it is searching
@@ -449,28 +689,127 @@ class PhotobashDocker(DockWidget):
         if position < len(self.foundImages) - len(self.imagesButtons) * self.currPage:
             self.addImageLayer(self.foundImages[position + len(self.imagesButtons) * self.currPage])
 
-    def changePath(self):
+    def updateRootsMenu(self):
+        self.rootsMenu.clear()
+
+        for root in self.rootPaths:
+            action = self.rootsMenu.addAction(root)
+            action.setCheckable(True)
+            action.setChecked(not root in self.disabledRootPaths)
+            action.toggled.connect(lambda checked, root=root: self.toggleRoot(root, checked))
+
+        if len(self.rootPaths) > 0:
+            self.rootsMenu.addSeparator()
+
+        self.rootsMenu.addAction("Add References Folder").triggered.connect(lambda: self.addRoot())
+
+        if len(self.rootPaths) > 0:
+            removeMenu = self.rootsMenu.addMenu("Remove References Folder")
+            for root in self.rootPaths:
+                removeMenu.addAction(root).triggered.connect(lambda checked, root=root: self.removeRoot(root))
+
+            self.rootsMenu.addAction("Refresh References Folders").triggered.connect(lambda: self.getImagesFromDirectory())
+
+        self.rootsMenu.addSeparator()
+        statsAction = self.rootsMenu.addAction("Show Performance Stats")
+        statsAction.setCheckable(True)
+        statsAction.setChecked(stats.enabled)
+        statsAction.toggled.connect(lambda checked: self.showStats(checked))
+
+        if stats.enabled:
+            self.rootsMenu.addAction("Save Performance Trace").triggered.connect(lambda: self.saveTrace())
+
+    def updateRootsSettings(self):
+        self.writeListSetting(self.rootsSetting, self.rootPaths)
+        self.writeListSetting(self.disabledRootsSetting, self.disabledRootPaths)
+
+        if len(self.rootPaths) == 0:
+            self.layout.changePathButton.setText("Set References Folder")
+        else:
+            self.layout.changePathButton.setText("References Folders")
+
+    def addRoot(self):
         fileDialog = QFileDialog(QWidget(self))
         fileDialog.setFileMode(QFileDialog.DirectoryOnly)
 
-        if self.directoryPath == "":
-            path = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
-        else:
-            path = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
-        
-        title = "Change Directory for Images"
+        path = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
+        title = "Add Directory for Images"
         dialogOptions = QFileDialog.ShowDirsOnly | QFileDialog.DontUseNativeDialog
-        self.directoryPath = fileDialog.getExistingDirectory(self.mainWidget, title, path, dialogOptions)
-        Application.writeSetting(self.applicationName, self.referencesSetting, self.directoryPath)
+        root = fileDialog.getExistingDirectory(self.mainWidget, title, path, dialogOptions)
 
-        self.favouriteImages = []
-        self.foundImages = []
+        if root == "" or root in self.rootPaths:
+            return
 
-        Application.writeSetting(self.applicationName, self.foundFavouritesSetting, "")
+        self.rootPaths.append(root)
+        self.updateRootsSettings()
 
-        if self.directoryPath == "":
-            self.layout.changePathButton.setText("Set References Folder")
+        self.currPage = 0
+        self.refreshRoot(root)
+        self.mergeRoots()
+
+    def removeRoot(self, root):
+        if root in self.rootPaths:
+            self.rootPaths.remove(root)
+        if root in self.disabledRootPaths:
+            self.disabledRootPaths.remove(root)
+        if root in self.rootIndexes:
+            self.rootIndexes.pop(root)
+        if root in self.rootSearchPaths:
+            self.rootSearchPaths.pop(root)
+
+        try:
+            os.remove(self.getRootIndexPath(root))
+        except OSError:
+            pass
+
+        self.updateRootsSettings()
+        self.currPage = 0
+        self.mergeRoots()
+
+    # only the toggled folder is refreshed, the others keep their index
+    def toggleRoot(self, root, enabled):
+        if enabled and root in self.disabledRootPaths:
+            self.disabledRootPaths.remove(root)
+            self.refreshRoot(root)
+        elif not enabled and not root in self.disabledRootPaths:
+            self.disabledRootPaths.append(root)
+
+        self.updateRootsSettings()
+        self.currPage = 0
+        self.mergeRoots()
+
+    # timings are only recorded while the stats are shown
+    def showStats(self, enabled):
+        if enabled != stats.enabled:
+            stats.reset()
+            Application.writeSetting(self.applicationName, self.statsSetting, "true" if enabled else "false")
+
+        stats.setEnabled(enabled)
+        self.statsLabel.setVisible(enabled)
+
+        if enabled:
+            self.updateStats()
+            self.statsTimer.start()
         else:
-            self.layout.changePathButton.setText("Change References Folder")
+            self.statsTimer.stop()
+
+    def updateStats(self):
+        self.statsLabel.setText(stats.text())
+        self.statsLabel.adjustSize()
+        self.statsLabel.raise_()
+
+    def saveTrace(self):
+        path = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation) + "/photobash_trace.json"
+        title = "Save Performance Trace"
+        path, _ = QFileDialog.getSaveFileName(self.mainWidget, title, path, "JSON (*.json)", "", QFileDialog.DontUseNativeDialog)
 
-        self.getImagesFromDirectory()
+        if path == "":
+            return
+
+        try:
+            stats.saveTrace(path)
+        except OSError as error:
+            dlg = QMessageBox(self)
+            dlg.setWindowTitle("Trace Not Saved!")
+            dlg.setText(f"The performance trace could not be saved: {error}")
+            dlg.exec()
@@ -17,9 +17,15 @@
 
 from krita import *
 from PyQt5 import QtWidgets, QtCore
+from .photobash_images_stats import stats
 
 DRAG_DELTA = 30
 TRIANGLE_SIZE = 20
+# time to wait after the last zoom, pan or resize before decoding again
+DECODE_DELAY = 150
+ZOOM_STEP = 1.25
+# how many screen pixels a single image pixel may cover at the maximum zoom
+MAX_PIXEL_SCALE = 4
 
 FAVOURITE_TRIANGLE = QPolygon([
     QPoint(0, 0),
@@ -111,6 +117,7 @@ def customMouseMoveEvent(self, event):
     if doc is None:
         return 
 
+    start = stats.start()
     scale = self.scale / 100
 
     # only scale to document if it exists
@@ -123,6 +130,7 @@ def customMouseMoveEvent(self, event):
 
     fullPixmap = QPixmap(50, 50).fromImage(fullImage)
     mimedata.setImageData(fullPixmap)
+    stats.stop("place drag", start)
 
     # Clipboard
     QApplication.clipboard().setImage(self.qimage)
@@ -131,22 +139,88 @@ def customMouseMoveEvent(self, event):
     drag = QDrag(self)
     drag.setMimeData(mimedata)
     drag.setPixmap(self.pixmap)
-    drag.setHotSpot(QPoint(self.qimage.width() / 2, self.qimage.height() / 2))
+    drag.setHotSpot(QPoint(int(self.pixmap.width() / 2), int(self.pixmap.height() / 2)))
     drag.exec_(Qt.CopyAction)
 
+class Photobash_Loader_Signals(QObject):
+    SIGNAL_LOADED = QtCore.pyqtSignal(int, QImage, QRect)
+
+# decodes an image outside of the main thread, already scaled to the size it will be displayed.
+# only used for formats that can scale (and clip) while decoding, so the full resolution image is never in memory
+class Photobash_Loader(QRunnable):
+    def __init__(self, signals, number, path, clipRect, scaledSize):
+        super(Photobash_Loader, self).__init__()
+        self.signals = signals
+        self.number = number
+        self.path = path
+        self.clipRect = clipRect
+        self.scaledSize = scaledSize
+
+    def run(self):
+        start = stats.start()
+        reader = QImageReader(self.path)
+        if not self.clipRect.isNull():
+            reader.setClipRect(self.clipRect)
+        reader.setScaledSize(self.scaledSize)
+
+        image = reader.read()
+        stats.stop("preview decode", start)
+
+        if not image.isNull():
+            self.signals.SIGNAL_LOADED.emit(self.number, image, self.clipRect)
+
 class Photobash_Display(QWidget):
     SIGNAL_HOVER = QtCore.pyqtSignal(str)
     SIGNAL_CLOSE = QtCore.pyqtSignal(int)
+    PREVIOUS_PAN_POS = None
     fitCanvasChecked = False
     scale = 100
 
     def __init__(self, parent):
         super(Photobash_Display, self).__init__(parent)
+        self.path = ""
+        # size of the original image, read from the header only
+        self.sourceSize = QSize()
+        # not every format can decode straight to a smaller size or a region, those keep the thumbnail
+        self.scaledDecoding = False
+        self.clipDecoding = False
+        # zoom is relative to fitting the whole image, center is in original image coordinates
+        self.zoom = 1
+        self.center = QPointF()
+        # part of the original image decoded at screen resolution, when zoomed in
+        self.regionImage = None
+        self.regionRect = QRect()
+
+        # every decode gets a number, so results arriving after the view changed are ignored
+        self.requestNumber = 0
+        self.baseRequest = -1
+        self.regionRequest = -1
+        self.pendingBaseSize = QSize()
+        self.pendingRegionRect = QRect()
+
+        self.loaderSignals = Photobash_Loader_Signals(self)
+        self.loaderSignals.SIGNAL_LOADED.connect(self.imageLoaded)
+
+        self.decodeTimer = QTimer(self)
+        self.decodeTimer.setSingleShot(True)
+        self.decodeTimer.setInterval(DECODE_DELAY)
+        self.decodeTimer.timeout.connect(self.decodeVisible)
+
+        # the display is not in a layout, so follow the size of the parent instead
+        parent.installEventFilter(self)
+
         customSetImage(self, None)
 
     def sizeHint(self):
         return QtCore.QSize(5000,5000)
 
+    def eventFilter(self, obj, event):
+        if obj == self.parentWidget() and event.type() == QEvent.Resize:
+            self.clampCenter()
+            self.decodeTimer.start()
+
+        return False
+
     def enterEvent(self, event):
         self.SIGNAL_HOVER.emit("D")
 
@@ -156,22 +230,184 @@ class Photobash_Display(QWidget):
     def mousePressEvent(self, event):
         if (event.modifiers() == QtCore.Qt.NoModifier and event.buttons() == QtCore.Qt.LeftButton):
             self.SIGNAL_CLOSE.emit(0)
+        if event.buttons() == QtCore.Qt.MiddleButton:
+            self.PREVIOUS_PAN_POS = QPointF(event.pos())
+
+    def mouseReleaseEvent(self, event):
+        self.PREVIOUS_PAN_POS = None
 
     def mouseMoveEvent(self, event):
+        # middle mouse button pans around when zoomed in
+        if self.PREVIOUS_PAN_POS is not None and event.buttons() & QtCore.Qt.MiddleButton:
+            if not self.sourceSize.isEmpty():
+                self.center -= (QPointF(event.pos()) - self.PREVIOUS_PAN_POS) / self.displayScale()
+                self.clampCenter()
+                self.update()
+                self.decodeTimer.start()
+
+            self.PREVIOUS_PAN_POS = QPointF(event.pos())
+            return
+
         customMouseMoveEvent(self, event)
 
+    def wheelEvent(self, event):
+        delta = event.angleDelta().y()
+        if self.sourceSize.isEmpty() or delta == 0:
+            return
+
+        # keep the point under the cursor in place while zooming
+        viewSize = self.viewSize()
+        offset = QPointF(event.pos()) - QPointF(viewSize.width() / 2, viewSize.height() / 2)
+        anchor = self.center + offset / self.displayScale()
+
+        maxZoom = max(1, MAX_PIXEL_SCALE / self.fitScale())
+        self.zoom = self.zoom * ZOOM_STEP if delta > 0 else self.zoom / ZOOM_STEP
+        self.zoom = max(1, min(self.zoom, maxZoom))
+
+        self.center = anchor - offset / self.displayScale()
+        self.clampCenter()
+        self.update()
+        self.decodeTimer.start()
+
     def setFitCanvas(self, newFit):
         self.fitCanvasChecked = newFit
 
     def setImageScale(self, newScale):
         self.scale = newScale
 
+    # shows the given image right away, and replaces it with a screen resolution version once decoded
     def setImage(self, path, image):
         self.path = path
+        reader = QImageReader(path)
+        self.sourceSize = reader.size() if path != "" else QSize()
+        self.scaledDecoding = path != "" and reader.supportsOption(QImageIOHandler.ScaledSize)
+        self.clipDecoding = self.scaledDecoding and reader.supportsOption(QImageIOHandler.ClipRect)
+        self.zoom = 1
+        self.center = QPointF(self.sourceSize.width() / 2, self.sourceSize.height() / 2)
+        self.regionImage = None
+        self.regionRect = QRect()
+        self.baseRequest = -1
+        self.regionRequest = -1
+        self.pendingBaseSize = QSize()
+        self.pendingRegionRect = QRect()
+
         customSetImage(self, image)
 
+        # an empty path clears the display, and any decode still running is ignored
+        if path == "":
+            self.decodeTimer.stop()
+        else:
+            self.decodeTimer.start()
+
+    # visible part of the widget, since the widget itself is as large as its size hint
+    def viewSize(self):
+        return self.rect().intersected(self.parentWidget().rect()).size()
+
+    # screen pixels per image pixel when the whole image fits the view
+    def fitScale(self):
+        viewSize = self.viewSize()
+        return max(min(viewSize.width() / self.sourceSize.width(), viewSize.height() / self.sourceSize.height()), 1e-6)
+
+    def displayScale(self):
+        return self.fitScale() * self.zoom
+
+    # part of the original image that is currently visible, in original image coordinates
+    def visibleRect(self):
+        viewSize = self.viewSize()
+        scale = self.displayScale()
+        width = viewSize.width() / scale
+        height = viewSize.height() / scale
+
+        return QRectF(self.center.x() - width / 2, self.center.y() - height / 2, width, height)
+
+    def clampCenter(self):
+        if self.sourceSize.isEmpty():
+            return
+
+        visible = self.visibleRect()
+        x = self.center.x()
+        y = self.center.y()
+
+        if visible.width() >= self.sourceSize.width():
+            x = self.sourceSize.width() / 2
+        else:
+            x = max(visible.width() / 2, min(x, self.sourceSize.width() - visible.width() / 2))
+
+        if visible.height() >= self.sourceSize.height():
+            y = self.sourceSize.height() / 2
+        else:
+            y = max(visible.height() / 2, min(y, self.sourceSize.height() - visible.height() / 2))
+
+        self.center = QPointF(x, y)
+
+    def startLoader(self, clipRect, scaledSize):
+        self.requestNumber += 1
+        loader = Photobash_Loader(self.loaderSignals, self.requestNumber, self.path, clipRect, scaledSize)
+        QThreadPool.globalInstance().start(loader)
+
+        return self.requestNumber
+
+    # decodes only what the view needs: the whole image at view resolution and,
+    # when zoomed past that resolution, the visible region of the original
+    def decodeVisible(self):
+        if self.path == "" or self.sourceSize.isEmpty() or self.viewSize().isEmpty() or not self.scaledDecoding:
+            return
+
+        ratio = self.devicePixelRatioF()
+        baseSize = self.sourceSize.scaled(self.viewSize() * ratio, Qt.KeepAspectRatio).boundedTo(self.sourceSize)
+        if baseSize.width() > self.qimage.width() and baseSize != self.pendingBaseSize:
+            self.pendingBaseSize = baseSize
+            self.baseRequest = self.startLoader(QRect(), baseSize)
+
+        scale = self.displayScale() * ratio
+        baseScale = max(self.qimage.width(), self.pendingBaseSize.width()) / self.sourceSize.width()
+        if self.zoom <= 1 or baseScale >= scale or not self.clipDecoding:
+            self.regionImage = None
+            self.regionRect = QRect()
+            self.regionRequest = -1
+            self.pendingRegionRect = QRect()
+            return
+
+        clipRect = self.visibleRect().toAlignedRect().intersected(QRect(QPoint(0, 0), self.sourceSize))
+        if clipRect.isEmpty() or clipRect == self.pendingRegionRect:
+            return
+
+        scaledSize = (QSizeF(clipRect.size()) * scale).toSize().boundedTo(clipRect.size())
+        self.pendingRegionRect = clipRect
+        self.regionRequest = self.startLoader(clipRect, scaledSize)
+
+    def imageLoaded(self, number, image, clipRect):
+        if number == self.baseRequest:
+            # keep the small pixmap for dragging, only the displayed image is replaced
+            self.qimage = image
+            self.baseRequest = -1
+        elif number == self.regionRequest:
+            self.regionImage = image
+            self.regionRect = clipRect
+            self.regionRequest = -1
+        else:
+            return
+
+        self.update()
+
     def paintEvent(self, event):
-        customPaintEvent(self, event)
+        if self.sourceSize.isEmpty() or self.qimage.isNull():
+            customPaintEvent(self, event)
+            return
+
+        viewSize = self.viewSize()
+        scale = self.displayScale()
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        painter.translate(viewSize.width() / 2, viewSize.height() / 2)
+        painter.scale(scale, scale)
+        painter.translate(-self.center.x(), -self.center.y())
+
+        # whole image first, then the sharper region on top of it
+        painter.drawImage(QRectF(0, 0, self.sourceSize.width(), self.sourceSize.height()), self.qimage)
+        if self.regionImage is not None:
+            painter.drawImage(QRectF(self.regionRect), self.regionImage)
 
 class Photobash_Button(QWidget):
     SIGNAL_HOVER = QtCore.pyqtSignal(str)
@@ -183,6 +419,7 @@ class Photobash_Button(QWidget):
     SIGNAL_UN_FAVOURITE = QtCore.pyqtSignal(str)
     SIGNAL_OPEN_NEW = QtCore.pyqtSignal(str)
     SIGNAL_REFERENCE = QtCore.pyqtSignal(str)
+    SIGNAL_REFERENCE_FULL = QtCore.pyqtSignal(str)
     SIGNAL_DRAG = QtCore.pyqtSignal(int)
     PREVIOUS_DRAG_X = None
     fitCanvasChecked = False
@@ -249,6 +486,7 @@ class Photobash_Button(QWidget):
         cmenuFavourite = cmenu.addAction(favouriteString)
         cmenuOpenNew = cmenu.addAction("Open as New Document")
         cmenuReference = cmenu.addAction("Place as Reference")
+        cmenuReferenceFull = cmenu.addAction("Place as Full Resolution Reference")
 
         background = qApp.palette().color(QPalette.Window).name().split("#")[1]
         cmenuStyleSheet = f"""QMenu {{ background-color: #AA{background}; border: 1px solid #{background}; }}"""
@@ -266,6 +504,8 @@ class Photobash_Button(QWidget):
             self.SIGNAL_OPEN_NEW.emit(self.path)
         if action == cmenuReference:
             self.SIGNAL_REFERENCE.emit(self.path)
+        if action == cmenuReferenceFull:
+            self.SIGNAL_REFERENCE_FULL.emit(self.path)
 
     def setImage(self, path, image):
         self.path = path
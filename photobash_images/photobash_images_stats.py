@@ -0,0 +1,158 @@
+# Photobash Images is a Krita plugin to get CC0 images based on a search,
+# straight from the Krita Interface. Useful for textures and concept art!
+# Copyright (C) 2020  Pedro Reis.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# number of most recent timings kept for each measurement
+ROLLING_SIZE = 500
+# number of most recent timings kept for the trace file
+TRACE_SIZE = 20000
+
+# Timings of the hot paths. When disabled, start() and stop() return right away,
+# so they can stay in the code at almost no cost.
+class Photobash_Stats():
+    def __init__(self):
+        self.enabled = False
+        # previews are decoded outside of the main thread, and record their timings too
+        self.lock = threading.Lock()
+        self.reset()
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+    def reset(self):
+        with self.lock:
+            # maps name to the most recent durations, in seconds
+            self.timings = {}
+            # maps name to [total duration, total items], for throughput
+            self.totals = {}
+            # maps name to a count, such as cache hits and misses
+            self.counters = {}
+            self.trace = deque(maxlen=TRACE_SIZE)
+            self.origin = time.perf_counter()
+
+    def start(self):
+        if not self.enabled:
+            return 0
+
+        return time.perf_counter()
+
+    # items is the amount of work done, such as files scanned
+    def stop(self, name, start, items=0):
+        if not self.enabled or start == 0:
+            return
+
+        end = time.perf_counter()
+        duration = end - start
+
+        with self.lock:
+            if not name in self.timings:
+                self.timings[name] = deque(maxlen=ROLLING_SIZE)
+                self.totals[name] = [0, 0]
+            self.timings[name].append(duration)
+            self.totals[name][0] += duration
+            self.totals[name][1] += items
+            self.trace.append((name, start - self.origin, duration, threading.get_ident()))
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def percentile(self, samples, value):
+        return samples[min(len(samples) - 1, int(len(samples) * value))]
+
+    def summary(self):
+        with self.lock:
+            timings = {name: list(samples) for name, samples in self.timings.items()}
+            totals = {name: list(total) for name, total in self.totals.items()}
+
+        results = {}
+
+        for name in sorted(timings.keys()):
+            samples = sorted(timings[name])
+            if len(samples) == 0:
+                continue
+
+            total, items = totals[name]
+            results[name] = {
+                "count": len(samples),
+                "p50_ms": self.percentile(samples, 0.5) * 1000,
+                "p95_ms": self.percentile(samples, 0.95) * 1000,
+                "max_ms": samples[-1] * 1000,
+            }
+            if items > 0 and total > 0:
+                results[name]["items_per_second"] = items / total
+
+        return results
+
+    def hitRate(self, name):
+        with self.lock:
+            hits = self.counters.get(name + " hit", 0)
+            misses = self.counters.get(name + " miss", 0)
+
+        if hits + misses == 0:
+            return None
+
+        return hits / (hits + misses)
+
+    def text(self):
+        lines = []
+
+        for name, result in self.summary().items():
+            line = f"{name}: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms"
+            if "items_per_second" in result:
+                line += f", {result['items_per_second']:.0f}/s"
+            lines.append(line)
+
+        for name in ["thumbnail cache", "placement cache"]:
+            hitRate = self.hitRate(name)
+            if hitRate is not None:
+                lines.append(f"{name}: {hitRate * 100:.0f}% hits")
+
+        if len(lines) == 0:
+            return "No measurements yet"
+
+        return "\n".join(lines)
+
+    # trace event format, can be opened in chrome://tracing or ui.perfetto.dev
+    def saveTrace(self, path):
+        with self.lock:
+            trace = list(self.trace)
+            counters = dict(self.counters)
+
+        events = []
+        for name, start, duration, thread in trace:
+            events.append({
+                "name": name,
+                "ph": "X",
+                "ts": start * 1000000,
+                "dur": duration * 1000000,
+                "pid": os.getpid(),
+                "tid": thread,
+            })
+
+        with open(path, "w", encoding="utf-8") as traceFile:
+            json.dump({"traceEvents": events, "summary": self.summary(), "counters": counters}, traceFile, indent=1)
+
+stats = Photobash_Stats()